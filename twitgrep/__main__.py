@@ -0,0 +1,7 @@
+"""Allow running the command line tool with ``python -m twitgrep``."""
+
+import sys
+
+from twitgrep import cli
+
+sys.exit(cli.main())
@@ -3,12 +3,17 @@
 """record the frequency of word occurance
 """
 
+from twitgrep import vocabulary
+
 
 class BagOfWords(object):
     """Represents a bag of words.
 
     All words in the bag are automatically made lowercase.
 
+    The counts are kept by word ID from a vocabulary.Vocabulary (the
+    shared one by default), rather than by word.
+
     How to make a bag:
 
     >>> bag = BagOfWords(["A", "bunch", "of", "words"])
@@ -20,13 +25,23 @@ class BagOfWords(object):
     6
     """
 
-    def __init__(self, words=None):
+    def __init__(self, words=None, vocab=None):
         """Instanciate a bag.
         """
-        self.words = {}
+        if vocab is None:
+            vocab = vocabulary.shared
+        self.vocab = vocab
+        self.counts = {}
         if words is not None:
             self.add_words(words)
 
+    @property
+    def words(self):
+        """A dict with the count of each word.
+        """
+        token = self.vocab.token
+        return {token(word_id): num for word_id, num in self.counts.items()}
+
     def add_words(self, words):
         """Add words to the bag.
 
@@ -37,14 +52,10 @@ class BagOfWords(object):
         >>> len(bag)
         5
         """
-        for word in words:
-            try:
-                num = self.words[word]
-            except KeyError:
-                num = 0
+        counts = self.counts
 
-            num = num + 1
-            self.words[word] = num
+        for word_id in self.vocab.add_all(words):
+            counts[word_id] = counts.get(word_id, 0) + 1
 
     def sorted_matrix(self, reverse=False):
         """Return a matrix with words and frequencies, sorted by
@@ -59,9 +70,10 @@ class BagOfWords(object):
         some 3
         """
 
-        matrix = [(k, self.words[k]) for k in sorted(self.words,
-                                                     key=self.words.get,
-                                                     reverse=reverse)]
+        token = self.vocab.token
+        counts = self.counts
+        matrix = [(token(k), counts[k])
+                  for k in sorted(counts, key=counts.get, reverse=reverse)]
         return matrix
 
     def __str__(self):
@@ -72,7 +84,7 @@ class BagOfWords(object):
     def __repr__(self):
         """Return the code needed to create this bag.
         """
-        return "BagOfWords(%s)" % self.words()
+        return "BagOfWords(%s)" % self.words
 
     def __len__(self):
         """Return the number of words in the bag.
@@ -84,7 +96,7 @@ class BagOfWords(object):
         >>> len(bag)
         4
         """
-        return len(self.words)
+        return len(self.counts)
 
 
 if __name__ == "__main__":
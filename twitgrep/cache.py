@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+"""Bounded caches for text that comes up over and over, like retweets and
+copy-pasted slogans.
+"""
+
+import collections
+import threading
+import time
+
+
+class LRUCache(object):
+    """A thread safe least-recently-used cache with an optional time to
+    live, in seconds, for each entry.
+
+    >>> cache = LRUCache(max_size=2)
+    >>> cache.put("a", 1)
+    >>> cache.put("b", 2)
+    >>> cache.get("a")
+    1
+    >>> cache.put("c", 3)
+    >>> cache.get("b") is None
+    True
+    >>> len(cache)
+    2
+    >>> cache.stats()
+    {'hits': 1, 'misses': 1, 'size': 2, 'max_size': 2}
+
+    A max_size of 0 disables the cache.
+    """
+
+    def __init__(self, max_size=10000, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the value stored for key, or default if there is none
+        or it has expired.
+        """
+
+        with self.lock:
+            try:
+                value, expires = self.entries[key]
+            except KeyError:
+                self.misses = self.misses + 1
+                return default
+
+            if expires is not None and expires < time.monotonic():
+                del self.entries[key]
+                self.misses = self.misses + 1
+                return default
+
+            self.entries.move_to_end(key)
+            self.hits = self.hits + 1
+            return value
+
+    def put(self, key, value):
+        """Store value for key, evicting the least recently used entry if
+        the cache is full.
+        """
+
+        if self.max_size < 1:
+            return
+
+        if self.ttl is None:
+            expires = None
+        else:
+            expires = time.monotonic() + self.ttl
+
+        with self.lock:
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries. The hit and miss counters are kept.
+        """
+
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Return a dict with the hit and miss counters and the size.
+        """
+
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "size": len(self.entries),
+                "max_size": self.max_size}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getstate__(self):
+        """Pickle the settings only; a copy starts out empty.
+        """
+        return {"max_size": self.max_size, "ttl": self.ttl}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+
+"""The twitgrep command line tool.
+
+Run it with ``python -m twitgrep <subcommand>``. Heavy modules (tweepy,
+SQLAlchemy) are only imported by the subcommands that need them, so
+offline work like scoring a file starts quickly.
+"""
+
+import argparse
+import pickle
+import sys
+import time
+
+from twitgrep import text
+
+
+def load_model(path):
+    """Load a model saved by the train subcommand.
+    """
+
+    with open(path, "rb") as file_handle:
+        return pickle.load(file_handle)
+
+
+def save_model(model, path):
+    """Save a model so it can be loaded with load_model.
+
+    The model gets a new model_id, so the scores stored by everyone who
+    loads this file can be told apart from those of other saves.
+    """
+
+    model.model_id = text.new_model_id()
+
+    with open(path, "wb") as file_handle:
+        pickle.dump(model, file_handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read_sentences(path):
+    """Return the normalized sentences in a file, or on stdin if path
+    is "-".
+    """
+
+    if path == "-":
+        return sentences_from_lines(sys.stdin)
+
+    with open(path, "r", encoding="utf-8") as file_handle:
+        return sentences_from_lines(file_handle)
+
+
+def sentences_from_lines(lines):
+    """Return the normalized sentences in an iterable of lines.
+
+    >>> sentences_from_lines(["En bra film. Så (jävla) bra!", ""])
+    ['en bra film', 'så jävla bra']
+    """
+
+    sentences = []
+
+    for line in lines:
+        if not line.strip():
+            continue
+
+        for sentence in text.normalize_and_split_sentences(line):
+            sentence = text.remove_junk_chars(sentence.lower())
+            if sentence:
+                sentences.append(sentence)
+
+    return sentences
+
+
+def install_profiler(args):
+    """Let long-running subcommands be profiled on demand.
+    """
+
+    from twitgrep import profiling
+
+    profiling.install(args.profile_dir, args.profile_seconds,
+                      control_file=args.profile_control_file)
+
+
+def cmd_stream(args):
+    """Print matching tweets as they arrive.
+    """
+
+    from twitgrep import grep
+
+    install_profiler(args)
+
+    for status in grep.TwitGrep(args.terms):
+        print("----------------------------\nTweet from user '%s':\n%s" %
+              (status.user.screen_name, status.text))
+
+
+def cmd_capture(args):
+    """Store (and score, if a model is given) matching tweet parts in the
+    database.
+    """
+
+    from twitgrep import twitsent
+
+    install_profiler(args)
+    sent = twitsent.TwitSent(args.db)
+    if args.model:
+        sent.model = load_model(args.model)
+
+    sent.stream_tweets(None, sent.model, args.term)
+
+
+def cmd_replay(args):
+    """Run the tweet parts stored in the database through a model.
+    """
+
+    from twitgrep import twitsent
+
+    model = load_model(args.model)
+    s = twitsent.TwitSent(args.db).session()
+
+    query = s.query(twitsent.TweetPart).order_by(twitsent.TweetPart.ident)
+    for part in query:
+        value, version = model.score(part.post_text)
+        print("%d\t%d\t%s" % (text.round_sentiment(value), version,
+                              part.post_text))
+
+
+def cmd_rescore(args):
+    """Rescore all stored tweet parts with a model, using worker processes.
+    """
+
+    from twitgrep import rescore
+
+    num_updated = rescore.rescore(args.model, args.db, workers=args.workers,
+                                  chunk_size=args.chunk_size,
+                                  checkpoint=args.checkpoint,
+                                  pause=args.pause,
+                                  missing_only=args.missing_only)
+    print("Rescored %d tweet parts." % num_updated)
+
+
+def cmd_score(args):
+    """Score the sentences in a file.
+    """
+
+    model = load_model(args.model)
+
+    for sentence in read_sentences(args.file):
+        value = text.round_sentiment(model.get_sentence_value(sentence))
+        print("%d\t%s" % (value, sentence))
+
+
+def cmd_train(args):
+    """Train a model on a labelled CSV corpus and save it.
+    """
+
+    from twitgrep import training
+
+    if args.engine == "hashed":
+        model = training.train_hashed(args.corpus, args.min_n, args.max_n,
+                                      epochs=args.epochs)
+    elif args.workers == 1:
+        model = training.train(args.corpus, args.min_n, args.max_n)
+    else:
+        model = training.train_parallel(args.corpus, args.min_n, args.max_n,
+                                        workers=args.workers)
+
+    save_model(model, args.output)
+
+
+def cmd_evaluate(args):
+    """Cross-validate a grid of NGramMatrix configurations on a corpus.
+    """
+
+    from twitgrep import evaluation
+    from twitgrep import training
+
+    if args.corpus is None:
+        rows = text.demo_train_data
+    else:
+        rows = [row for chunk in training.read_corpus(args.corpus)
+                for row in chunk]
+
+    grid = evaluation.make_grid(args.max_n, args.stop_words)
+    results = evaluation.grid_search(rows, grid, k=args.folds,
+                                     workers=args.workers)
+    evaluation.print_report(results)
+
+
+def cmd_export(args):
+    """Write the tweet parts stored in the database as CSV.
+    """
+
+    import csv
+
+    from twitgrep import twitsent
+
+    s = twitsent.TwitSent(args.db).session()
+    writer = csv.writer(sys.stdout)
+
+    query = s.query(twitsent.TweetPart).order_by(twitsent.TweetPart.ident)
+    for part in query:
+        writer.writerow([part.ident, part.search_term, part.user,
+                         part.post_text, part.sentiment, part.target])
+
+
+def cmd_bench(args):
+    """Measure how many sentences per second a model can score.
+    """
+
+    model = load_model(args.model)
+    sentences = read_sentences(args.file)
+
+    # Otherwise every round after the first is served from the score
+    # cache, which measures the cache instead of the model.
+    score_cache = getattr(model, "score_cache", None)
+    if score_cache is not None:
+        score_cache.clear()
+        score_cache.max_size = 0
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        if hasattr(model, "score_batch"):
+            model.score_batch(sentences)
+        else:
+            for sentence in sentences:
+                model.get_sentence_value(sentence)
+    duration = time.perf_counter() - start
+
+    total = len(sentences) * args.rounds
+    print("Scored %d sentences in %.3f s, %d per second." %
+          (total, duration, total / duration if duration else 0))
+
+
+def make_parser():
+    """Return the argument parser for all subcommands.
+    """
+
+    parser = argparse.ArgumentParser(prog="twitgrep")
+    parser.add_argument("--profile-dir", default=".",
+                        help="where stream and capture write profiles "
+                        "taken on SIGUSR1")
+    parser.add_argument("--profile-seconds", type=float, default=30,
+                        help="how long each profile runs")
+    parser.add_argument("--profile-control-file",
+                        help="start a profile when this file is created")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sub = subparsers.add_parser("stream", help=cmd_stream.__doc__.strip())
+    sub.add_argument("terms", nargs="+")
+    sub.set_defaults(func=cmd_stream)
+
+    sub = subparsers.add_parser("capture", help=cmd_capture.__doc__.strip())
+    sub.add_argument("term")
+    sub.add_argument("-m", "--model")
+    sub.add_argument("--db", default="sqlite:///tweets.sqlite")
+    sub.set_defaults(func=cmd_capture)
+
+    sub = subparsers.add_parser("replay", help=cmd_replay.__doc__.strip())
+    sub.add_argument("-m", "--model", required=True)
+    sub.add_argument("--db", default="sqlite:///tweets.sqlite")
+    sub.set_defaults(func=cmd_replay)
+
+    sub = subparsers.add_parser("rescore", help=cmd_rescore.__doc__.strip())
+    sub.add_argument("-m", "--model", required=True)
+    sub.add_argument("--db", default="sqlite:///tweets.sqlite")
+    sub.add_argument("-w", "--workers", type=int, default=None)
+    sub.add_argument("--chunk-size", type=int, default=5000)
+    sub.add_argument("--checkpoint",
+                     help="file to resume from and record progress in")
+    sub.add_argument("--pause", type=float, default=0.05,
+                     help="seconds to wait between chunks")
+    sub.add_argument("--missing-only", action="store_true",
+                     help="only score parts without a sentiment")
+    sub.set_defaults(func=cmd_rescore)
+
+    sub = subparsers.add_parser("score", help=cmd_score.__doc__.strip())
+    sub.add_argument("-m", "--model", required=True)
+    sub.add_argument("file", nargs="?", default="-")
+    sub.set_defaults(func=cmd_score)
+
+    sub = subparsers.add_parser("train", help=cmd_train.__doc__.strip())
+    sub.add_argument("corpus")
+    sub.add_argument("-o", "--output", required=True)
+    sub.add_argument("--min-n", type=int, default=1)
+    sub.add_argument("--max-n", type=int, default=3)
+    sub.add_argument("-w", "--workers", type=int, default=None)
+    sub.add_argument("-e", "--engine", choices=["matrix", "hashed"],
+                     default="matrix")
+    sub.add_argument("--epochs", type=int, default=5,
+                     help="passes over the corpus for the hashed engine")
+    sub.set_defaults(func=cmd_train)
+
+    sub = subparsers.add_parser("evaluate",
+                                help=cmd_evaluate.__doc__.strip())
+    sub.add_argument("corpus", nargs="?",
+                     help="labelled CSV corpus (default: the demo data)")
+    sub.add_argument("-k", "--folds", type=int, default=5)
+    sub.add_argument("--max-n", type=int, default=3)
+    sub.add_argument("--stop-words", nargs="+",
+                     choices=["none", "swedish"], default=None)
+    sub.add_argument("-w", "--workers", type=int, default=None)
+    sub.set_defaults(func=cmd_evaluate)
+
+    sub = subparsers.add_parser("export", help=cmd_export.__doc__.strip())
+    sub.add_argument("--db", default="sqlite:///tweets.sqlite")
+    sub.set_defaults(func=cmd_export)
+
+    sub = subparsers.add_parser("bench", help=cmd_bench.__doc__.strip())
+    sub.add_argument("-m", "--model", required=True)
+    sub.add_argument("-r", "--rounds", type=int, default=10)
+    sub.add_argument("file", nargs="?", default="-")
+    sub.set_defaults(func=cmd_bench)
+
+    return parser
+
+
+def main(argv=None):
+    """Run the twitgrep command line tool.
+    """
+
+    args = make_parser().parse_args(argv)
+
+    try:
+        args.func(args)
+    except KeyboardInterrupt:
+        print()
+        return 1
+    except BrokenPipeError:
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
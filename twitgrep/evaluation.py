@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+"""Compare NGramMatrix configurations on a labelled corpus.
+
+Each configuration is a (min_n, max_n, stop-word set) combination. It is
+evaluated with k-fold cross-validation, and the report shows the error
+next to the training time, scoring throughput and model size, so the
+cheapest configuration that is accurate enough can be picked.
+Configurations are evaluated in parallel worker processes.
+"""
+
+import math
+import multiprocessing
+import sys
+import time
+
+from twitgrep import text
+from twitgrep import vocabulary
+
+stop_word_sets = {
+    "none": frozenset(),
+    "swedish": text.swedish_stop_words,
+    }
+
+
+def k_folds(rows, k):
+    """Yield (train_rows, test_rows) for each of k folds. Row i is in the
+    test set of fold i % k.
+
+    >>> [(len(train), len(test)) for train, test in k_folds(range(5), 2)]
+    [(2, 3), (3, 2)]
+    """
+
+    rows = list(rows)
+
+    for fold in range(0, k):
+        train_rows = [row for i, row in enumerate(rows) if i % k != fold]
+        test_rows = [row for i, row in enumerate(rows) if i % k == fold]
+        yield train_rows, test_rows
+
+
+def matrix_size(matrix):
+    """Return (number of ngram keys, number of values trained on,
+    approximate bytes) for an NGramMatrix. Its vocabulary is not
+    counted, and neither are empty shards, whose fixed size would hide
+    the differences between configurations.
+
+    >>> matrix_size(text.NGramMatrix(3, 3))
+    (0, 0, 0)
+    """
+
+    num_keys = 0
+    num_values = 0
+    num_bytes = 0
+
+    for n in range(matrix.min_n, matrix.max_n + 1):
+        for ngram_dict in matrix.matrix[n]:
+            if not ngram_dict:
+                continue
+
+            num_keys += len(ngram_dict)
+            num_bytes += sys.getsizeof(ngram_dict)
+
+            for dict_key, entry in ngram_dict.items():
+                num_values += entry[1]
+                num_bytes += sys.getsizeof(dict_key) + sys.getsizeof(entry)
+
+    return num_keys, num_values, num_bytes
+
+
+def evaluate(rows, min_n, max_n, stop_words_name="none", k=5):
+    """Cross-validate one configuration and return a dict of results.
+
+    >>> result = evaluate(text.demo_train_data, 1, 2, "swedish", k=3)
+    >>> result["min_n"], result["max_n"], result["stop_words"]
+    (1, 2, 'swedish')
+    >>> result["mae"] < 100
+    True
+    """
+
+    stop_words = stop_word_sets[stop_words_name]
+    rows = [(text.remove_words(sentence, stop_words), value)
+            for sentence, value in rows]
+
+    errors = []
+    num_correct_sign = 0
+    train_time = 0.0
+    score_time = 0.0
+    sizes = []
+
+    for train_rows, test_rows in k_folds(rows, k):
+        # Without a cache, so the throughput is that of real scoring,
+        # and with a fresh vocabulary, so every fold and configuration
+        # pays the same cost for adding new words.
+        matrix = text.NGramMatrix(min_n, max_n, cache_size=0,
+                                  vocab=vocabulary.Vocabulary())
+
+        start = time.perf_counter()
+        for sentence, value in train_rows:
+            matrix.set_sentence_value(sentence, value)
+        train_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        predictions = [matrix.get_sentence_value(sentence)
+                       for sentence, value in test_rows]
+        score_time += time.perf_counter() - start
+
+        for prediction, (sentence, value) in zip(predictions, test_rows):
+            errors.append(prediction - value)
+            if (prediction >= 0) == (value >= 0):
+                num_correct_sign += 1
+
+        sizes.append(matrix_size(matrix))
+
+    num_keys, num_values, num_bytes = [sum(size) / len(sizes)
+                                       for size in zip(*sizes)]
+
+    return {"min_n": min_n,
+            "max_n": max_n,
+            "stop_words": stop_words_name,
+            "mae": sum(abs(error) for error in errors) / len(errors),
+            "rmse": math.sqrt(sum(error * error for error in errors) /
+                              len(errors)),
+            "sign_accuracy": num_correct_sign / len(errors),
+            "train_time": train_time / k,
+            "scores_per_second": len(errors) / score_time if score_time
+            else 0,
+            "num_keys": num_keys,
+            "num_values": num_values,
+            "num_bytes": num_bytes}
+
+
+def make_grid(max_n=3, stop_words_names=None):
+    """Return all (min_n, max_n, stop_words_name) configurations with
+    1 <= min_n <= max_n <= the given max_n.
+
+    >>> make_grid(2, ["none"])
+    [(1, 1, 'none'), (1, 2, 'none'), (2, 2, 'none')]
+    """
+
+    if stop_words_names is None:
+        stop_words_names = sorted(stop_word_sets)
+
+    return [(min_n, top_n, name)
+            for min_n in range(1, max_n + 1)
+            for top_n in range(min_n, max_n + 1)
+            for name in stop_words_names]
+
+
+def grid_search(rows, grid, k=5, workers=None):
+    """Evaluate every configuration in grid in worker processes, and
+    return the results sorted by mean absolute error.
+    """
+
+    rows = list(rows)
+    tasks = [(rows, min_n, max_n, name, k) for min_n, max_n, name in grid]
+
+    with multiprocessing.Pool(workers) as pool:
+        results = pool.starmap(evaluate, tasks)
+
+    return sorted(results, key=lambda result: result["mae"])
+
+
+def print_report(results, file=sys.stdout):
+    """Print a table with one line per configuration.
+    """
+
+    file.write("%5s %5s %-8s %7s %7s %6s %9s %10s %8s %10s\n" %
+               ("min_n", "max_n", "stop", "mae", "rmse", "sign",
+                "train_s", "scores/s", "keys", "bytes"))
+
+    for result in results:
+        file.write("%5d %5d %-8s %7.2f %7.2f %6.2f %9.4f %10d %8d %10d\n" %
+                   (result["min_n"], result["max_n"], result["stop_words"],
+                    result["mae"], result["rmse"], result["sign_accuracy"],
+                    result["train_time"], result["scores_per_second"],
+                    result["num_keys"], result["num_bytes"]))
+
+
+if __name__ == "__main__":
+    print_report(grid_search(text.demo_train_data, make_grid(), k=5))
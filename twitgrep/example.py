@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """Example file illustrating how to use twitgrep from another program."""
 
-import twitgrep
+from twitgrep import grep
 
 SEARCH_TERMS = ["python", "#svpol", "emacs"]
 
@@ -9,7 +9,7 @@ print("Streaming search results for search terms: " + str(SEARCH_TERMS))
 print("Press Ctrl-c to exit.")
 
 try:
-    for status in twitgrep.TwitGrep(SEARCH_TERMS):
+    for status in grep.TwitGrep(SEARCH_TERMS):
         print("----------------------------\nTweet from user '%s':\n%s" %
               (status.user.screen_name, status.text))
 except KeyboardInterrupt:
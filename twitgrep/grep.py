@@ -7,6 +7,10 @@ import threading
 
 import tweepy
 
+# Put on a subscription's queue by Subscription.close, to wake up the
+# reader waiting for the next tweet.
+_CLOSED = object()
+
 class TwitterThread(threading.Thread):
     def __init__(self, msg_queue, keywords):
         super(TwitterThread, self).__init__()
@@ -27,7 +31,6 @@ class TwitterThread(threading.Thread):
 
 
     def run(self):
-        super(TwitterThread, self).__init__()
         self.listener = Listener(self.msg_queue)
 
         # Start listening for incoming tweets.
@@ -49,16 +52,37 @@ class TwitterThread(threading.Thread):
 
 
 class TwitGrep(object):
-    "TwitGrep class. It's an iterator."
+    """TwitGrep class. It's an iterator.
+
+    If a TwitGrepHub is given, the tweets are taken from its stream
+    instead of opening a new one. The hub must track all of keywords
+    (or keywords can be None); it may track more, so pass a predicate
+    to filter out tweets for its other keywords.
+    """
+
+    def __init__(self, keywords, hub=None, predicate=None):
+        if hub is not None and keywords:
+            untracked = [keyword for keyword in keywords
+                         if keyword not in hub.keywords]
+            if untracked:
+                raise ValueError("The hub does not track %s" %
+                                 ", ".join(untracked))
 
-    def __init__(self, keywords):
         self.twitter_thread = None
         self.keywords = keywords
+        self.hub = hub
+        self.predicate = predicate
+        self.subscription = None
         self.msg_queue = queue.Queue()
 
 
     def __iter__(self):
         "This is called when iteration starts."
+        if self.hub is not None:
+            if self.subscription is None:
+                self.subscription = self.hub.subscribe(self.predicate)
+            return self
+
         # Start a separate thread for listening to stuff from Twitter.
         # When it detects something, it will send a message (on msg_queue)
         # to the main thread (this one).
@@ -69,12 +93,190 @@ class TwitGrep(object):
 
     def __next__(self):
         "This is called on each iteration."
+        if self.subscription is not None:
+            return next(self.subscription)
+
         # Wait for the next message from the Twitter thread.
         # No telling how long this will take - perhaps everybody on
         # Twitter is shutting up today (HA!).
         stat = self.msg_queue.get()
         return stat
 
+    def close(self):
+        "Stop reading from the hub, ending the iteration."
+        if self.subscription is not None:
+            self.subscription.close()
+
+
+class Subscription(object):
+    """One subscriber to a TwitGrepHub. It's an iterator.
+
+    Each subscription has its own bounded queue. If the subscriber falls
+    behind and the queue fills up, new tweets are dropped for it (and
+    counted in dropped) rather than holding up the other subscribers.
+
+    Closing a subscription ends the iteration, also for a reader that
+    is waiting for the next tweet.
+
+    The examples use a hub whose stream is marked as started, so that
+    nothing connects to Twitter, and stand-ins for tweepy statuses:
+
+    >>> from types import SimpleNamespace
+    >>> hub = TwitGrepHub(["python", "#svpol"])
+    >>> hub.twitter_thread = "started"
+    >>> subscription = hub.subscribe(lambda status: "#svpol" in status.text,
+    ...                              maxsize=2)
+    >>> for tweet in ["#svpol ett", "python", "#svpol två", "#svpol tre"]:
+    ...     hub.put(SimpleNamespace(text=tweet))
+    >>> subscription.dropped
+    1
+    >>> [next(subscription).text, next(subscription).text]
+    ['#svpol ett', '#svpol två']
+
+    A reader blocked in another thread is woken up by close:
+
+    >>> reader = threading.Thread(target=list, args=(subscription,))
+    >>> reader.start()
+    >>> subscription.close()
+    >>> reader.join(5)
+    >>> reader.is_alive(), hub.subscriptions
+    (False, [])
+    >>> hub.put(SimpleNamespace(text="#svpol fyra"))
+    >>> list(subscription)
+    []
+    """
+
+    def __init__(self, hub, predicate=None, maxsize=1000):
+        self.hub = hub
+        self.predicate = predicate
+        self.msg_queue = queue.Queue(maxsize)
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, status):
+        "Queue status for this subscriber, if it passes the predicate."
+        if self.closed:
+            return
+
+        if self.predicate is not None and not self.predicate(status):
+            return
+
+        try:
+            self.msg_queue.put_nowait(status)
+        except queue.Full:
+            self.dropped = self.dropped + 1
+
+    def close(self):
+        "Stop receiving tweets, and wake up the reader."
+        if self.closed:
+            return
+
+        self.closed = True
+        self.hub.unsubscribe(self)
+
+        # If the queue is full, drop the oldest tweets to make room.
+        while True:
+            try:
+                self.msg_queue.put_nowait(_CLOSED)
+                return
+            except queue.Full:
+                try:
+                    self.msg_queue.get_nowait()
+                    self.dropped = self.dropped + 1
+                except queue.Empty:
+                    pass
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed and self.msg_queue.empty():
+            raise StopIteration
+
+        status = self.msg_queue.get()
+        if status is _CLOSED:
+            # Leave it there, for the next call and any other readers.
+            # An offer that raced with close may have taken the slot;
+            # the empty check above ends the iteration after it then.
+            try:
+                self.msg_queue.put_nowait(_CLOSED)
+            except queue.Full:
+                pass
+            raise StopIteration
+        return status
+
+
+class TwitGrepHub(object):
+    """Share one Twitter stream between many subscribers.
+
+    The stream is opened when the first subscriber attaches, and every
+    tweet is decoded once and handed to all subscribers. Subscribers can
+    attach and detach at any time without reconnecting:
+
+        hub = TwitGrepHub(["python", "#svpol"])
+        for status in hub.subscribe(lambda status: "#svpol" in status.text):
+            ...
+
+    Every subscriber gets every tweet that passes its predicate (here
+    with the stream marked as started, so nothing connects to Twitter):
+
+    >>> from types import SimpleNamespace
+    >>> hub = TwitGrepHub(["python", "#svpol"])
+    >>> hub.twitter_thread = "started"
+    >>> everything = hub.subscribe()
+    >>> svpol = hub.subscribe(lambda status: "#svpol" in status.text)
+    >>> hub.put(SimpleNamespace(text="python"))
+    >>> hub.put(SimpleNamespace(text="#svpol"))
+    >>> everything.msg_queue.qsize(), svpol.msg_queue.qsize()
+    (2, 1)
+    >>> hub.unsubscribe(everything)
+    >>> hub.subscriptions == [svpol]
+    True
+    >>> TwitGrep(["java"], hub=hub)
+    Traceback (most recent call last):
+    ...
+    ValueError: The hub does not track java
+    """
+
+    def __init__(self, keywords):
+        self.keywords = keywords
+        self.twitter_thread = None
+        self.subscriptions = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, predicate=None, maxsize=1000):
+        """Return a new Subscription, starting the stream if needed.
+
+        predicate is an optional function that gets each status and
+        returns True if the subscriber wants it.
+        """
+
+        subscription = Subscription(self, predicate, maxsize)
+
+        with self.lock:
+            # Copy on write, so put() can loop over the list unlocked.
+            self.subscriptions = self.subscriptions + [subscription]
+
+            if self.twitter_thread is None:
+                self.twitter_thread = TwitterThread(self, self.keywords)
+                self.twitter_thread.start()
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        "Detach a subscription. The stream keeps running."
+        with self.lock:
+            self.subscriptions = [other for other in self.subscriptions
+                                  if other is not subscription]
+
+    def put(self, status):
+        """Hand status to all subscribers. The Listener calls this, as if
+        the hub was its message queue.
+        """
+
+        for subscription in self.subscriptions:
+            subscription.offer(status)
+
 
 class Listener(tweepy.streaming.StreamListener):
 
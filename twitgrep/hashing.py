@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+"""A fixed-memory sentiment model using hashed n-gram features.
+
+Instead of storing every n-gram it has seen, HashedNGramModel hashes the
+n-grams of a sentence into a fixed-size NumPy weight vector (the hashing
+trick), and learns the weights online with stochastic gradient descent.
+Its memory use does not grow with the vocabulary.
+
+It has the same update/score interface as text.NGramMatrix, so the two
+can be used interchangeably.
+"""
+
+import threading
+import uuid
+import zlib
+
+import numpy as np
+
+DEFAULT_NUM_FEATURES = 2 ** 20
+
+# Used to combine word hashes into n-gram hashes; an odd 64-bit constant.
+HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+class HashedNGramModel(object):
+    """A linear model over hashed 1..n-gram features.
+
+    The value of a sentence is the weighted average of the weights of
+    its n-grams, where each n-gram counts n times, like in NGramMatrix.
+
+    >>> model = HashedNGramModel(1, 2, num_features=2 ** 12)
+    >>> model.fit([("bra film", 80), ("dålig film", -80)], epochs=50)
+    50
+    >>> model.get_sentence_value("bra film") > 50
+    True
+    >>> model.get_sentence_value("dålig film") < -50
+    True
+    >>> model.weights.nbytes
+    32768
+    """
+
+    def __init__(self, min_n, max_n, num_features=DEFAULT_NUM_FEATURES,
+                 learning_rate=0.5):
+        self.min_n = min_n
+        self.max_n = max_n
+        self.num_features = num_features
+        self.learning_rate = learning_rate
+        self.weights = np.zeros(num_features)
+        self.version = 0
+        self.model_id = uuid.uuid4().hex
+        self._write_lock = threading.Lock()
+
+    def __getstate__(self):
+        """Return the state to pickle, leaving out the write lock.
+        """
+        state = self.__dict__.copy()
+        del state["_write_lock"]
+        return state
+
+    def __setstate__(self, state):
+        """Restore a pickled model with a fresh write lock.
+        """
+        self.__dict__.update(state)
+        self._write_lock = threading.Lock()
+
+    def features(self, sentences):
+        """Return (rows, indices, values) for the hashed n-grams of a list
+        of sentences, sorted by row.
+
+        rows says which sentence each feature belongs to. Each word is
+        hashed once, and the hashes of longer n-grams are combined from
+        the word hashes with NumPy for the whole batch at once. Each
+        n-gram counts n times, and the values of a sentence add up to one.
+
+        >>> model = HashedNGramModel(1, 2, num_features=16)
+        >>> rows, indices, values = model.features(["bra film", "bra"])
+        >>> rows.tolist()
+        [0, 0, 0, 1]
+        >>> values.tolist()
+        [0.25, 0.25, 0.5, 1.0]
+        >>> bool(indices[0] == indices[3])
+        True
+        """
+
+        crc32 = zlib.crc32
+        hashes = []
+        word_rows = []
+
+        for row, sentence in enumerate(sentences):
+            # Same case rules as text.Word: usernames keep their case.
+            if "@" in sentence:
+                words = [word if word[:1] == "@" else word.lower()
+                         for word in sentence.split(" ")]
+            else:
+                words = sentence.lower().split(" ")
+
+            hashes.extend([crc32(word.encode("utf-8")) for word in words])
+            word_rows.extend([row] * len(words))
+
+        hashes = np.array(hashes, dtype=np.uint64)
+        word_rows = np.array(word_rows, dtype=np.int64)
+        num_words = len(hashes)
+
+        all_rows = [np.zeros(0, dtype=np.int64)]
+        all_indices = [np.zeros(0, dtype=np.uint64)]
+        all_values = [np.zeros(0)]
+
+        for n in range(self.min_n, self.max_n + 1):
+            count = num_words - n + 1
+            if count < 1:
+                break
+
+            # An n-gram must not span two sentences.
+            valid = word_rows[:count] == word_rows[n - 1:n - 1 + count]
+
+            combined = np.full(count, n, dtype=np.uint64)
+            for offset in range(0, n):
+                combined = combined * HASH_MULTIPLIER + \
+                    hashes[offset:offset + count]
+
+            all_rows.append(word_rows[:count][valid])
+            all_indices.append(combined[valid] % np.uint64(self.num_features))
+            all_values.append(np.full(int(valid.sum()), float(n)))
+
+        rows = np.concatenate(all_rows)
+        order = np.argsort(rows, kind="stable")
+        rows = rows[order]
+        indices = np.concatenate(all_indices)[order].astype(np.int64)
+        values = np.concatenate(all_values)[order]
+
+        totals = np.bincount(rows, weights=values, minlength=len(sentences))
+        values = values / totals[rows]
+
+        return rows, indices, values
+
+    def update(self, rows, removed=()):
+        """Take one SGD step per (sentence, value) row and return the new
+        version.
+
+        removed is accepted for compatibility with NGramMatrix.update and
+        ignored: learned weights can't be taken back out, but the steps
+        toward the new values also move the model away from the old ones.
+
+        Readers are not blocked while this runs, so a sentence scored at
+        the same time may see some of the new weights and not others.
+        """
+
+        rows = list(rows)
+        sentences = [sentence for sentence, value in rows]
+        feature_rows, indices, values = self.features(sentences)
+        bounds = np.searchsorted(feature_rows, np.arange(len(rows) + 1))
+
+        with self._write_lock:
+            weights = self.weights
+
+            for row, (sentence, value) in enumerate(rows):
+                start, end = bounds[row], bounds[row + 1]
+                row_indices = indices[start:end]
+                row_values = values[start:end]
+                error = value - np.dot(weights[row_indices], row_values)
+
+                np.add.at(weights, row_indices,
+                          self.learning_rate * error * row_values)
+
+            self.version = self.version + 1
+            return self.version
+
+    def fit(self, rows, epochs=5):
+        """Train on a list of (sentence, value) rows for some epochs, and
+        return the new version.
+        """
+
+        for _ in range(epochs):
+            version = self.update(rows)
+
+        return version
+
+    def set_sentence_value(self, sentence, value):
+        """Train on a single sentence.
+        """
+
+        self.update([(sentence, value)])
+
+    def get_sentence_value(self, sentence):
+        """Get the value for a sentence.
+        """
+
+        return self.score(sentence)[0]
+
+    def score(self, sentence):
+        """Return (value, version) for a sentence.
+        """
+
+        version = self.version
+        value = float(self.score_batch([sentence])[0])
+
+        return value, version
+
+    def score_batch(self, sentences):
+        """Return a NumPy array with the values for many sentences.
+
+        The features of all sentences form one sparse matrix, which is
+        multiplied with the weights in a single step.
+
+        >>> model = HashedNGramModel(1, 2, num_features=2 ** 12)
+        >>> _ = model.fit([("bra film", 80), ("dålig film", -80)], epochs=50)
+        >>> batch = model.score_batch(["bra film", "dålig film", ""])
+        >>> batch.round().tolist()
+        [80.0, -80.0, 0.0]
+        """
+
+        rows, indices, values = self.features(sentences)
+
+        return np.bincount(rows, weights=self.weights[indices] * values,
+                           minlength=len(sentences))
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+"""Take profiler snapshots of a running process on demand.
+
+Call install() early in a long-running program. After that, sending the
+process SIGUSR1 (or creating the control file, if one was given) starts
+a time-boxed sampling of the stacks of all threads, including
+TwitterThread. The samples are written as a collapsed-stack file that
+flamegraph.pl, speedscope and similar tools can read.
+
+Nothing runs until a capture is requested, so this costs nothing when
+it is off.
+"""
+
+import collections
+import os
+import signal
+import sys
+import threading
+import time
+
+DEFAULT_DURATION = 30
+DEFAULT_INTERVAL = 0.005
+
+_capture_lock = threading.Lock()
+
+
+class Sampler(threading.Thread):
+    """A thread that samples the stacks of all other threads for a while
+    and writes them to a collapsed-stack file.
+    """
+
+    def __init__(self, path, duration=DEFAULT_DURATION,
+                 interval=DEFAULT_INTERVAL):
+        super(Sampler, self).__init__(name="Sampler", daemon=True)
+        self.path = path
+        self.duration = duration
+        self.interval = interval
+        self.stacks = collections.Counter()
+
+    def run(self):
+        try:
+            end_time = time.monotonic() + self.duration
+            while time.monotonic() < end_time:
+                self.sample()
+                time.sleep(self.interval)
+
+            self.write()
+        finally:
+            _capture_lock.release()
+
+    def sample(self):
+        """Add the current stack of every other thread to the counts.
+        """
+
+        threads = {thread.ident: thread for thread in threading.enumerate()}
+
+        for ident, frame in sys._current_frames().items():
+            if ident == self.ident:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                file_name = os.path.basename(code.co_filename)
+                stack.append("%s (%s:%d)" % (code.co_name, file_name,
+                                             code.co_firstlineno))
+                frame = frame.f_back
+
+            stack.append(thread_name(threads.get(ident)))
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+
+    def write(self):
+        """Write the collected stacks, one "stack count" line each.
+        """
+
+        with open(self.path, "w", encoding="utf-8") as file_handle:
+            for stack, count in self.stacks.most_common():
+                file_handle.write("%s %d\n" % (stack, count))
+
+
+def thread_name(thread):
+    """Return a readable name for a thread, preferring the name of its
+    class for Thread subclasses like TwitterThread.
+    """
+
+    if thread is None:
+        return "unknown thread"
+
+    if type(thread) is threading.Thread or \
+       isinstance(thread, threading._MainThread):
+        return thread.name
+
+    return type(thread).__name__
+
+
+def capture(output_dir=".", duration=DEFAULT_DURATION,
+            interval=DEFAULT_INTERVAL):
+    """Start a capture in the background and return the path it will be
+    written to, or None if a capture is already running.
+    """
+
+    if not _capture_lock.acquire(blocking=False):
+        return None
+
+    path = os.path.join(output_dir, "twitgrep-%d-%s.folded" %
+                        (os.getpid(), time.strftime("%Y%m%d-%H%M%S")))
+    try:
+        Sampler(path, duration, interval).start()
+    except BaseException:
+        _capture_lock.release()
+        raise
+
+    return path
+
+
+def watch_control_file(control_file, output_dir, duration, interval):
+    """Start a capture whenever control_file shows up, then remove it.
+
+    If the file contains a number, it is used as the duration in seconds.
+    """
+
+    while True:
+        time.sleep(1)
+
+        if not os.path.exists(control_file):
+            continue
+
+        try:
+            with open(control_file, "r") as file_handle:
+                contents = file_handle.read().strip()
+            os.remove(control_file)
+        except OSError:
+            continue
+
+        try:
+            seconds = float(contents)
+        except ValueError:
+            seconds = duration
+
+        capture(output_dir, seconds, interval)
+
+
+def install(output_dir=".", duration=DEFAULT_DURATION,
+            interval=DEFAULT_INTERVAL, control_file=None):
+    """Start a capture on SIGUSR1, and when control_file is created.
+
+    This must be called from the main thread. On platforms without
+    SIGUSR1, only the control file can be used.
+    """
+
+    if hasattr(signal, "SIGUSR1"):
+        def handler(signum, frame):
+            capture(output_dir, duration, interval)
+
+        signal.signal(signal.SIGUSR1, handler)
+
+    if control_file is not None:
+        threading.Thread(target=watch_control_file,
+                         args=(control_file, output_dir, duration, interval),
+                         name="ProfileControlWatcher",
+                         daemon=True).start()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+"""Rescore the tweet parts stored in the database with a new model.
+
+The tweet_part table is read in primary key order, one chunk at a time,
+and each chunk is scored by a pool of worker processes. The scores are
+written back with one executemany update per chunk. After each chunk,
+the last primary key done is written to a checkpoint file, so an
+interrupted run can be resumed. A short pause between chunks leaves
+room for a live writer like TwitSent.
+"""
+
+import collections
+import multiprocessing
+import os
+import pickle
+import time
+
+from sqlalchemy import bindparam, select
+
+from twitgrep import text
+from twitgrep import twitsent
+
+DEFAULT_CHUNK_SIZE = 5000
+
+_model = None
+
+
+def load_worker_model(model_path):
+    """Load the model once in each worker process.
+    """
+
+    global _model
+
+    with open(model_path, "rb") as file_handle:
+        _model = pickle.load(file_handle)
+
+
+def score_rows(rows):
+    """Return update parameters for a chunk of (ident, post_text) rows.
+    """
+
+    sentences = [post_text or "" for ident, post_text in rows]
+
+    if hasattr(_model, "score_batch"):
+        version = _model.version
+        values = _model.score_batch(sentences)
+    else:
+        version = None
+        values = []
+        for sentence in sentences:
+            value, version = _model.score(sentence)
+            values.append(value)
+
+    return [{"b_ident": ident,
+             "b_sentiment": text.round_sentiment(value),
+             "b_model_id": _model.model_id,
+             "b_version": version}
+            for (ident, post_text), value in zip(rows, values)]
+
+
+def read_checkpoint(path):
+    """Return the last primary key written by a previous run, or 0.
+    """
+
+    if path is None or not os.path.exists(path):
+        return 0
+
+    with open(path, "r") as file_handle:
+        return int(file_handle.read().strip() or 0)
+
+
+def write_checkpoint(path, ident):
+    """Record that all rows up to ident are done.
+    """
+
+    if path is None:
+        return
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as file_handle:
+        file_handle.write("%d\n" % ident)
+    os.replace(temp_path, path)
+
+
+def read_chunks(engine, start_ident, chunk_size, missing_only=False):
+    """Yield lists of (ident, post_text) rows with ident > start_ident.
+
+    Each chunk is a separate keyset query (ident > last ident seen), so
+    no read transaction is held open between chunks.
+    """
+
+    table = twitsent.TweetPart.__table__
+    last_ident = start_ident
+
+    while True:
+        query = select(table.c.ident, table.c.post_text) \
+            .where(table.c.ident > last_ident) \
+            .order_by(table.c.ident) \
+            .limit(chunk_size)
+        if missing_only:
+            query = query.where(table.c.sentiment.is_(None))
+
+        with engine.connect() as conn:
+            rows = [tuple(row) for row in conn.execute(query)]
+
+        if not rows:
+            return
+
+        yield rows
+        last_ident = rows[-1][0]
+
+
+def rescore(model_path, db_url="sqlite:///tweets.sqlite", workers=None,
+            chunk_size=DEFAULT_CHUNK_SIZE, checkpoint=None, pause=0.05,
+            missing_only=False):
+    """Rescore the stored tweet parts with the model at model_path, and
+    return the number of rows updated.
+
+    >>> import os, shutil, tempfile
+    >>> from twitgrep import cli
+    >>> directory = tempfile.mkdtemp()
+    >>> db_url = "sqlite:///" + os.path.join(directory, "tweets.sqlite")
+    >>> model_path = os.path.join(directory, "model.pickle")
+    >>> checkpoint = os.path.join(directory, "checkpoint")
+    >>> model = text.NGramMatrix(1, 2)
+    >>> model.update([("bra film", 80), ("dålig film", -80)])
+    1
+    >>> cli.save_model(model, model_path)
+    >>> s = twitsent.TwitSent(db_url).session()
+    >>> s.add_all([twitsent.TweetPart(post_text=post_text) for post_text
+    ...            in ["bra film"] * 12 + ["dålig film"]])
+    >>> s.commit()
+    >>> rescore(model_path, db_url, workers=1, chunk_size=5,
+    ...         checkpoint=checkpoint, pause=0)
+    13
+    >>> rows = s.query(twitsent.TweetPart.sentiment,
+    ...                twitsent.TweetPart.model_id,
+    ...                twitsent.TweetPart.model_version).distinct().all()
+    >>> model_id = cli.load_model(model_path).model_id
+    >>> sorted(rows) == [(-80, model_id, 1), (80, model_id, 1)]
+    True
+
+    A run that resumes from the checkpoint has nothing left to do, and
+    missing_only only scores the parts without a sentiment:
+
+    >>> rescore(model_path, db_url, workers=1, checkpoint=checkpoint, pause=0)
+    0
+    >>> s.query(twitsent.TweetPart).first().sentiment = None
+    >>> s.commit()
+    >>> rescore(model_path, db_url, workers=1, pause=0, missing_only=True)
+    1
+    >>> s.close()
+    >>> shutil.rmtree(directory)
+    """
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    engine = twitsent.TwitSent(db_url).engine
+    table = twitsent.TweetPart.__table__
+    statement = table.update() \
+        .where(table.c.ident == bindparam("b_ident")) \
+        .values(sentiment=bindparam("b_sentiment"),
+                model_id=bindparam("b_model_id"),
+                model_version=bindparam("b_version"))
+
+    start_ident = read_checkpoint(checkpoint)
+    num_updated = 0
+    pending = collections.deque()
+
+    def write(result):
+        params = result.get()
+        with engine.begin() as conn:
+            conn.execute(statement, params)
+        write_checkpoint(checkpoint, params[-1]["b_ident"])
+        time.sleep(pause)
+        return len(params)
+
+    with multiprocessing.Pool(workers, initializer=load_worker_model,
+                              initargs=(model_path,)) as pool:
+        for rows in read_chunks(engine, start_ident, chunk_size,
+                                missing_only):
+            pending.append(pool.apply_async(score_rows, (rows,)))
+
+            if len(pending) >= workers * 2:
+                num_updated += write(pending.popleft())
+
+        while pending:
+            num_updated += write(pending.popleft())
+
+    return num_updated
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
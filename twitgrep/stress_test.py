@@ -6,7 +6,7 @@ from __future__ import print_function
 import sys
 import time
 
-import twitgrep
+from twitgrep import grep
 
 num_total = 0
 
@@ -16,7 +16,7 @@ end_time = start_time + duration
 
 now = start_time
 
-for status in twitgrep.TwitGrep(["python", "#svpol", "and"]):
+for status in grep.TwitGrep(["python", "#svpol", "and"]):
     num_total = num_total + 1
     if int(time.time()) == now:
         sys.stdout.write(".")
@@ -3,12 +3,20 @@
 """Classes for words and sentences.
 """
 
-import doctest
+import array
+import gc
+import threading
 
 from twitgrep import bag_of_words
+from twitgrep import cache
+from twitgrep import vocabulary
 
-swedish_stop_words = ["den", "en", "ett", "och",
-                      "det", "att"]
+swedish_stop_words = frozenset(["den", "en", "ett", "och",
+                                "det", "att"])
+
+# Retweets and copy-pasted text make the same strings show up over and
+# over, so the text pipeline remembers its most recent results.
+sentence_cache = cache.LRUCache(max_size=10000, ttl=3600)
 
 
 class Word(object):
@@ -140,15 +148,16 @@ def remove_junk_chars(text):
 def remove_words(text, words_to_remove=swedish_stop_words):
     """Return a copy of the text string with the specified words (not Words)
     removed.
-    """
 
-    output = ""
+    >>> remove_words("det är en bra film")
+    'är bra film'
+    """
 
-    for word in text.split(" "):
-        if word not in words_to_remove:
-            output += word + " "
+    if not isinstance(words_to_remove, (set, frozenset)):
+        words_to_remove = frozenset(words_to_remove)
 
-    return output.strip()
+    return " ".join([word for word in text.split(" ")
+                     if word not in words_to_remove]).strip()
 
 
 def split_sentences(text):
@@ -176,6 +185,23 @@ def split_sentence(text):
     return words
 
 
+def sentence_tokens(text):
+    """Given a normalized sentence, return its words as strings, with the
+    same case rules as Word. This is much faster than split_sentence.
+
+    >>> sentence_tokens("Hej @Enfors se HTTP://x.se")
+    ['hej', '@Enfors', 'se', 'http://x.se']
+    >>> [str(word) for word in split_sentence("Hej @Enfors se HTTP://x.se")]
+    ['hej', '@Enfors', 'se', 'http://x.se']
+    """
+
+    if "@" not in text:
+        return text.lower().split(" ")
+
+    return [word if word[:1] == "@" else word.lower()
+            for word in text.split(" ")]
+
+
 def normalize_and_split_sentences(text):
     """Return normalized sentences.
 
@@ -187,10 +213,25 @@ def normalize_and_split_sentences(text):
     ['Foo bar', 'Another small sentence']
     """
 
-    text = normalize(text)
-    sentences = split_sentences(text)
+    sentences = sentence_cache.get(text)
+    if sentences is None:
+        sentences = split_sentences(normalize(text))
+        sentence_cache.put(text, sentences)
+
+    # Callers may modify the list, so never hand out the cached one.
+    return list(sentences)
 
-    return sentences
+
+def round_sentiment(value):
+    """Return a model score rounded the way it is stored and printed.
+
+    >>> round_sentiment(41.5), round_sentiment(-12.7), round_sentiment(None)
+    (42, -13, None)
+    """
+
+    if value is None:
+        return None
+    return int(round(value))
 
 
 def normalize_whitespace(text):
@@ -280,69 +321,490 @@ class NGram(object):
         return True
 
 
+def new_model_id():
+    """Return a random ID for a new model.
+    """
+
+    import uuid  # Only needed when a model is made; slow to import.
+    return uuid.uuid4().hex
+
+
 class NGramMatrix(object):
-    """A list of dicts, where each dict will hold NGrams.
+    """A list of sharded dicts, where each dict will hold NGrams.
+
+    The ngrams of length n are spread over NUM_SHARDS dicts by the hash
+    of their key, so that an online update only has to copy the few
+    shards it touches. Only the n from min_n to max_n get shards. Each
+    dict maps an n-gram, packed into an integer key of word IDs from a
+    vocabulary.Vocabulary, to a [value_sum, count] list.
+
+    The matrix can be trained in batch with set_sentence_value, or
+    updated online with update while other threads keep scoring it.
+    Every online update publishes a new snapshot and bumps the version.
+    Together with model_id, a random ID given to every new (or newly
+    saved) model, the version tells which model a score came from:
+
+    >>> matrix = NGramMatrix(1, 2)
+    >>> matrix.version
+    0
+    >>> matrix.update([("bra film", 80), ("dålig film", -80)])
+    1
+    >>> matrix.score("bra film")
+    (80.0, 1)
+
+    Scores are cached per sentence until the matrix changes:
+
+    >>> matrix.score("bra film")
+    (80.0, 1)
+    >>> matrix.score_cache.hits
+    1
+    >>> matrix.update([("bra film", 20)])
+    2
+    >>> matrix.score("bra film")[1]
+    2
     """
 
-    def __init__(self, min_n, max_n):
+    NUM_SHARDS = 1024
+    SHARD_MASK = NUM_SHARDS - 1
+
+    def __init__(self, min_n, max_n, cache_size=10000, cache_ttl=None,
+                 vocab=None):
         self.min_n = min_n
         self.max_n = max_n
-        self.matrix = []
+        if vocab is None:
+            vocab = vocabulary.shared
+        self.vocab = vocab
+        self.model_id = new_model_id()
+        self.score_cache = cache.LRUCache(cache_size, cache_ttl)
+        self._write_lock = threading.Lock()
+
+        # Readers pick up (matrix, version) in a single attribute read,
+        # so they always see a consistent snapshot without locking.
+        self._snapshot = (self.empty_matrix(), 0)
+
+    def __getstate__(self):
+        """Return the state to pickle, leaving out the write lock.
+
+        The ngrams are stored as returned by packed, which pickles and
+        unpickles much faster than dicts of small lists.
+        """
+        state = self.__dict__.copy()
+        del state["_write_lock"]
+        del state["_snapshot"]
+
+        state["packed"] = self.packed()
+        state["version"] = self.version
+        return state
+
+    def __setstate__(self, state):
+        """Restore a pickled matrix with a fresh write lock.
+        """
+        state = dict(state)
+        packed = state.pop("packed")
+        version = state.pop("version")
+
+        self.__dict__.update(state)
+        self._write_lock = threading.Lock()
+
+        self._snapshot = (self.empty_matrix(), version)
+        self.merge_packed(packed)
+
+    def empty_matrix(self):
+        """Return a list with empty shards for each n from min_n to max_n,
+        indexed by n. The unused places below min_n are None.
+        """
+
+        return [self.make_shards([]) if n >= self.min_n else None
+                for n in range(0, self.max_n + 1)]
+
+    @classmethod
+    def make_shards(cls, items):
+        """Return a list of NUM_SHARDS dicts holding (key, entry) items.
+        """
+
+        shards = [{} for _ in range(0, cls.NUM_SHARDS)]
+        mask = cls.SHARD_MASK
+        for dict_key, entry in items:
+            shards[hash(dict_key) & mask][dict_key] = entry
+        return shards
+
+    @property
+    def matrix(self):
+        """The current ngram shards: a list of dicts for each n.
+        """
+        return self._snapshot[0]
+
+    @property
+    def version(self):
+        """The number of online updates applied to the matrix.
+        """
+        return self._snapshot[1]
+
+    def ngram_items(self, n):
+        """Yield (key, [value_sum, count]) for every ngram of length n.
+        """
+
+        for ngram_dict in self.matrix[n]:
+            yield from ngram_dict.items()
+
+    def sentence_keys(self, sentence, add=True):
+        """Yield (n, key) for every ngram in sentence that the matrix uses.
+
+        If add is False, no new words are added to the vocabulary, and
+        ngrams with unknown words (which can't be in the matrix) are
+        skipped.
+        """
+
+        tokens = sentence_tokens(sentence)
+        if add:
+            ids = self.vocab.add_all(tokens)
+        else:
+            ids = self.vocab.lookup_all(tokens)
+
+        return self.id_keys(ids)
+
+    def id_keys(self, ids):
+        """Yield (n, key) for every ngram in a list of word IDs, skipping
+        ngrams with None (unknown) IDs.
+        """
 
-        for n in range(0, max_n + 1):
-            self.matrix.append({})
+        pack = vocabulary.pack
+
+        for n in range(self.min_n, self.max_n + 1):
+            for index in range(0, len(ids) - n + 1):
+                ngram_ids = ids[index:index + n]
+                if None in ngram_ids:
+                    continue
+                yield n, pack(ngram_ids)
+
+    def ngram_text(self, n, key):
+        """Return the words of a packed ngram key as a string.
+
+        >>> matrix = NGramMatrix(1, 2)
+        >>> keys = list(matrix.sentence_keys("bra film"))
+        >>> [matrix.ngram_text(n, key) for n, key in keys]
+        ['bra', 'film', 'bra film']
+        """
+
+        return " ".join([self.vocab.token(token_id)
+                         for token_id in vocabulary.unpack(key, n)])
 
     def set_sentence_value(self, sentence, value):
         """Give a value to a sentence, and all its ngrams.
+
+        This modifies the matrix in place, so it is meant for batch
+        training before anyone starts scoring. Use update to add values
+        while the matrix is being scored.
         """
 
+        self.set_ids_value(self.vocab.add_all(sentence_tokens(sentence)),
+                           value)
+
+    def set_ids_value(self, ids, value):
+        """Like set_sentence_value, for a sentence given as word IDs.
+        """
+
+        self.score_cache.clear()
+        matrix = self.matrix
+        mask = self.SHARD_MASK
+
+        for n, dict_key in self.id_keys(ids):
+            ngram_dict = matrix[n][hash(dict_key) & mask]
+            try:
+                entry = ngram_dict[dict_key]
+            except KeyError:
+                entry = [0, 0]
+                ngram_dict[dict_key] = entry
+
+            entry[0] = entry[0] + value
+            entry[1] = entry[1] + 1
+
+    def merge(self, other, translate=True):
+        """Add the values of another matrix with the same n range to this
+        one, in place.
+
+        Merging is associative, so partial matrices trained on
+        consecutive parts of a corpus can be merged in order to get the
+        same matrix as training on the whole corpus. If the other matrix
+        uses another vocabulary (e.g. it was trained in another process),
+        its keys are translated to this one's, unless translate is False
+        because its keys were made from IDs this vocabulary handed out.
+
+        Entries for ngrams this matrix doesn't have are taken over from
+        other without copying, so other should not be used afterwards.
+
+        >>> whole = NGramMatrix(1, 2)
+        >>> whole.set_sentence_value("bra film", 80)
+        >>> whole.set_sentence_value("dålig film", -80)
+        >>> first = NGramMatrix(1, 2)
+        >>> first.set_sentence_value("bra film", 80)
+        >>> second = NGramMatrix(1, 2, vocab=vocabulary.Vocabulary())
+        >>> second.set_sentence_value("dålig film", -80)
+        >>> first.merge(second)
+        >>> first.matrix == whole.matrix
+        True
+
+        Value sums are floats, so with fractional values they can differ
+        from those of serial training in the last bits, since they are
+        added up in another order. Scores agree to well within 1e-9:
+
+        >>> whole = NGramMatrix(1, 1)
+        >>> for value in [0.1, 0.2, 0.3]:
+        ...     whole.set_sentence_value("film", value)
+        >>> first = NGramMatrix(1, 1)
+        >>> first.set_sentence_value("film", 0.1)
+        >>> second = NGramMatrix(1, 1)
+        >>> second.set_sentence_value("film", 0.2)
+        >>> second.set_sentence_value("film", 0.3)
+        >>> first.merge(second)
+        >>> abs(first.score("film")[0] - whole.score("film")[0]) < 1e-9
+        True
+        """
+
+        if (self.min_n, self.max_n) != (other.min_n, other.max_n):
+            raise ValueError("Can't merge NGramMatrix(%d, %d) into "
+                             "NGramMatrix(%d, %d)" %
+                             (other.min_n, other.max_n,
+                              self.min_n, self.max_n))
+
+        self.score_cache.clear()
+
+        if not translate or other.vocab is self.vocab:
+            id_map = None
+        else:
+            # Translate the other vocabulary's IDs with one table lookup
+            # per ID, instead of going through the token strings.
+            id_map = self.vocab.add_all(other.vocab.tokens)
+
         for n in range(self.min_n, self.max_n + 1):
-            ngrams = make_ngrams(split_sentence(sentence), n)
+            other_shards = other.matrix[n]
+            if id_map is not None:
+                # Translated keys may belong in other shards.
+                other_shards = self.make_shards(vocabulary.translate(
+                    other.ngram_items(n), n, id_map))
+
+            for ngram_dict, other_dict in zip(self.matrix[n], other_shards):
+                if not other_dict:
+                    continue
+
+                # Only ngrams in both need adding up; the rest are copied
+                # over in bulk by dict.update.
+                common = [(dict_key, ngram_dict[dict_key]) for dict_key
+                          in ngram_dict.keys() & other_dict.keys()]
+                ngram_dict.update(other_dict)
+
+                for dict_key, (value_sum, count) in common:
+                    other_sum, other_count = other_dict[dict_key]
+                    ngram_dict[dict_key] = [value_sum + other_sum,
+                                            count + other_count]
+
+    def packed(self):
+        """Return the ngrams as compact arrays: for each n from min_n to
+        max_n, a list of (shard index, keys, sums, counts) for the shards
+        that aren't empty.
+
+        The arrays pickle much faster than the dicts, so this is how
+        partial matrices are sent between processes, to be added to
+        another matrix with merge_packed.
+        """
 
-            for ngram in ngrams:
-                dict_key = str(ngram)
+        packed = []
 
+        for n in range(self.min_n, self.max_n + 1):
+            shard_arrays = []
+
+            for index, ngram_dict in enumerate(self.matrix[n]):
+                if not ngram_dict:
+                    continue
+
+                keys = list(ngram_dict)
                 try:
-                    ngram_values = self.matrix[n][dict_key]
-                except KeyError:
-                    ngram_values = []
+                    keys = array.array("Q", keys)
+                except TypeError:
+                    pass  # Some keys are tuples; see vocabulary.pack.
+
+                entries = ngram_dict.values()
+                shard_arrays.append(
+                    (index, keys,
+                     array.array("d", [entry[0] for entry in entries]),
+                     array.array("q", [entry[1] for entry in entries])))
+
+            packed.append(shard_arrays)
+
+        return packed
+
+    def merge_packed(self, packed):
+        """Add ngrams returned by packed on a matrix with the same n
+        range and vocabulary to this one, in place.
+
+        >>> first = NGramMatrix(1, 2)
+        >>> first.set_sentence_value("bra film", 80)
+        >>> second = NGramMatrix(1, 2)
+        >>> second.set_sentence_value("dålig film", -80)
+        >>> first.merge_packed(second.packed())
+        >>> first.score("film")
+        (0.0, 0)
+        """
+
+        self.score_cache.clear()
+
+        # This adds up to millions of [value_sum, count] lists, and the
+        # garbage collector would go through the whole matrix every few
+        # thousand of them. Lists of numbers can't form cycles, so the
+        # collector is paused meanwhile.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+
+        try:
+            for n, shard_arrays in zip(range(self.min_n, self.max_n + 1),
+                                       packed):
+                shards = self.matrix[n]
+
+                for index, keys, sums, counts in shard_arrays:
+                    self._merge_shard(shards[index], keys, sums, counts)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    @staticmethod
+    def _merge_shard(ngram_dict, keys, sums, counts):
+        """Add arrays of keys, sums and counts to one shard.
+        """
+
+        if ngram_dict:
+            common = [(dict_key, ngram_dict[dict_key]) for dict_key
+                      in ngram_dict.keys() & keys]
+        else:
+            common = []
+
+        # Only ngrams in both need adding up; the rest are added in bulk
+        # by dict.update.
+        ngram_dict.update(zip(keys, map(list, zip(sums, counts))))
+
+        for dict_key, (value_sum, count) in common:
+            entry = ngram_dict[dict_key]
+            entry[0] = value_sum + entry[0]
+            entry[1] = count + entry[1]
+
+    def update(self, rows, removed=()):
+        """Fold (sentence, value) rows into the matrix, take the values
+        of the removed (sentence, value) rows back out of it, and return
+        the new version.
+
+        Only the shards and entries touched by rows are copied; the
+        new snapshot is swapped in when all rows have been added, so
+        concurrent readers never block and never see a half-done update.
+        Passing many rows at once saves copying the same shards again.
+
+        Correcting a label is one update, so no reader sees the sentence
+        with both labels or with neither:
+
+        >>> matrix = NGramMatrix(1, 1)
+        >>> matrix.update([("tråkig", 60)])
+        1
+        >>> matrix.update([("tråkig", -60)], removed=[("tråkig", 60)])
+        2
+        >>> matrix.score("tråkig")
+        (-60.0, 2)
+        >>> matrix.update([], removed=[("tråkig", -60)])
+        3
+        >>> matrix.score("tråkig")
+        (0, 3)
+        """
 
-                ngram_values.append(value)
-                self.matrix[n][dict_key] = ngram_values
+        with self._write_lock:
+            old_matrix, version = self._snapshot
+            matrix = list(old_matrix)
+            mask = self.SHARD_MASK
+            copied_lists = set()
+            copied_shards = set()
+            copied_entries = set()
+
+            changes = [(sentence, -value, -1) for sentence, value in removed]
+            changes.extend((sentence, value, 1) for sentence, value in rows)
+
+            for sentence, value, count in changes:
+                for n, dict_key in self.sentence_keys(sentence,
+                                                      add=count > 0):
+                    if n not in copied_lists:
+                        matrix[n] = list(matrix[n])
+                        copied_lists.add(n)
+
+                    index = hash(dict_key) & mask
+                    if (n, index) not in copied_shards:
+                        matrix[n][index] = dict(matrix[n][index])
+                        copied_shards.add((n, index))
+                    ngram_dict = matrix[n][index]
+
+                    # Copy each entry once per update, then change the
+                    # copy, which no reader can see yet.
+                    if (n, dict_key) not in copied_entries:
+                        entry = ngram_dict.get(dict_key)
+                        if entry is None:
+                            if count < 0:
+                                continue  # Nothing to take out.
+                            entry = [0, 0]
+                        entry = list(entry)
+                        ngram_dict[dict_key] = entry
+                        copied_entries.add((n, dict_key))
+                    else:
+                        entry = ngram_dict[dict_key]
+
+                    entry[0] = entry[0] + value
+                    entry[1] = entry[1] + count
+
+            # Drop the ngrams that have had all their values removed.
+            for n, dict_key in copied_entries:
+                ngram_dict = matrix[n][hash(dict_key) & mask]
+                if ngram_dict[dict_key][1] <= 0:
+                    del ngram_dict[dict_key]
+
+            version = version + 1
+            self._snapshot = (matrix, version)
+            self.score_cache.clear()
+
+        return version
 
     def get_sentence_value(self, sentence):
         """Get the value for a sentence.
         """
 
-        all_values = []
+        return self.score(sentence)[0]
 
-        for n in range(self.min_n, self.max_n + 1):
-            ngrams = make_ngrams(split_sentence(sentence), n)
+    def score(self, sentence):
+        """Return (value, version) for a sentence, where version tells
+        which snapshot of the matrix the value came from.
+        """
 
-            for ngram in ngrams:
-                dict_key = str(ngram)
-                value_sum = 0
+        matrix, version = self._snapshot
 
-                try:
-                    values = self.matrix[n][dict_key]
-                    for value in values:
-                        value_sum = value_sum + value
+        # A reader that started before an update may store a result from
+        # the old snapshot after the clear, so check the version too.
+        cached = self.score_cache.get(sentence)
+        if cached is not None and cached[1] == version:
+            return cached
+
+        all_values = []
+        mask = self.SHARD_MASK
 
-                        avg = value_sum / len(values)
+        for n, dict_key in self.sentence_keys(sentence, add=False):
+            try:
+                value_sum, count = matrix[n][hash(dict_key) & mask][dict_key]
 
-                    # Multiply the average with n, to weigh it.
-                    # 3-gram matches are three times more significant than
-                    # unigram matches.
-                    all_values.append(avg * n)
-                except KeyError:
-                    pass  # This ngram didn't exist
+                # Multiply the average with n, to weigh it.
+                # 3-gram matches are three times more significant than
+                # unigram matches.
+                all_values.append(value_sum / count * n)
+            except KeyError:
+                pass  # This ngram didn't exist
 
         try:
             avg = sum(all_values) / len(all_values)
         except ZeroDivisionError:
             avg = 0
 
-        return avg
+        self.score_cache.put(sentence, (avg, version))
+        return avg, version
 
 
 def make_ngrams(words, n):
@@ -361,6 +823,70 @@ def make_ngrams(words, n):
     return n_grams
 
 
+# Labelled sentences (film reviews) used by demo() and for evaluation.
+demo_train_data = [
+    ["helt klart århundradets bästa film", 95],
+    ["en film i absolut världsklass", 90],
+    ["det här är årets bästa film alla kategorier", 85],
+    ["så jävla bra", 83],
+    ["jag är övertygad om att om 20 år kommer alla säga att detta "
+     "är en klassiker", 80],
+    ["det är helt klart en hysteriskt kul film", 80],
+    ["en fantastiskt bra film", 85],
+    ["en fantastisk film", 80],
+    ["en jättebra film helt enkelt", 78],
+    ["en mycket bra film", 75],
+    ["den var riktigt bra måste jag säga", 75],
+    ["jättebra film skulle vilja se fler av samma regisör", 75],
+    ["en riktigt bra film", 70],
+    ["den är jätterolig", 70],
+    ["perfekt för en mysig hemmakväll", 65],
+    ["definitivt en kultklassiker", 60],
+    ["den var förvånande nog ganska bra ändå", 60],
+    ["den här filmen var helt okej tycker jag", 50],
+    ["jag skulle gärna se fler såna här filmer", 40],
+    ["det är en rolig film", 35],
+    ["jag tyckte väl att den var ganska bra", 30],
+    ["jag tycker den är ganska rolig", 25],
+    ["den duger en regning kväll", 25],
+    ["godkänd men inte mer än så skulle jag säga", 20],
+    ["den var lite rolig måste jag erkänna", 20],
+    ["knappt godkänd men har sina poänger", 15],
+    ["den kunde ha varit värre", 10],
+    ["inte den bästa jag sett men inte det sämsta heller", 0],
+    ["vad ska man säga det var inget man vill se igen direkt", -15],
+    ["en småtråkig film måste jag säga", -10],
+    ["den här filmen är inte särskilt rolig", -15],
+    ["den är inget vidare", -20],
+    ["den var tråkig vill inte se den igen", -20],
+    ["dålig film som inte alls är rolig", -25],
+    ["mycket tråkig film tycker jag", -30],
+    ["den var jättetråkig", -30],
+    ["den var ganska dålig faktiskt", -30],
+    ["jag tycker den är ganska kass faktiskt", -35],
+    ["det här var inget mästerverk direkt", -35],
+    ["den sunkigaste film jag sett på länge", -40],
+    ["denna så kallade komedi är inte ett dugg rolig", -40],
+    ["en riktigt dålig film", -50],
+    ["rent skräp finns inget annat att säga", -65],
+    ["så himla trist", -60],
+    ["så trist att jag nästan somnade", -65],
+    ["hur sopig som helst", -70],
+    ["asdålig film fattar inte att de gör sånt", -75],
+    ["den här filmen suger helt enkelt", -75],
+    ["fattar inte hur en film kan vara så dålig", -75],
+    ["filmen suger stenhårt", -80],
+    ["det var 90 minuter av mitt liv jag aldrig kommer att få "
+     "tillbaka", -80],
+    ["detta var rent skräp finns inget annat att säga", -80],
+    ["en riktig jävla skitfilm", -85],
+    ["den var riktigt jävla sämst", -87],
+    ["århundradets sämsta film alla kategorier", -90],
+    ["det är den sämsta film jag någonsin sett", -90],
+    ["aldrig har mänligheten utsatts för värre smörja än detta", -95],
+    ]
+
+
 def demo():
     """Demonstrate the functionality in action.
     """
@@ -391,68 +917,6 @@ def demo():
 
     print("min_n: %d, max_n: %d" % (min_n, max_n))
 
-    train_data = [
-        ["helt klart århundradets bästa film", 95],
-        ["en film i absolut världsklass", 90],
-        ["det här är årets bästa film alla kategorier", 85],
-        ["så jävla bra", 83],
-        ["jag är övertygad om att om 20 år kommer alla säga att detta "
-         "är en klassiker", 80],
-        ["det är helt klart en hysteriskt kul film", 80],
-        ["en fantastiskt bra film", 85],
-        ["en fantastisk film", 80],
-        ["en jättebra film helt enkelt", 78],
-        ["en mycket bra film", 75],
-        ["den var riktigt bra måste jag säga", 75],
-        ["jättebra film skulle vilja se fler av samma regisör", 75],
-        ["en riktigt bra film", 70],
-        ["den är jätterolig", 70],
-        ["perfekt för en mysig hemmakväll", 65],
-        ["definitivt en kultklassiker", 60],
-        ["den var förvånande nog ganska bra ändå", 60],
-        ["den här filmen var helt okej tycker jag", 50],
-        ["jag skulle gärna se fler såna här filmer", 40],
-        ["det är en rolig film", 35],
-        ["jag tyckte väl att den var ganska bra", 30],
-        ["jag tycker den är ganska rolig", 25],
-        ["den duger en regning kväll", 25],
-        ["godkänd men inte mer än så skulle jag säga", 20],
-        ["den var lite rolig måste jag erkänna", 20],
-        ["knappt godkänd men har sina poänger", 15],
-        ["den kunde ha varit värre", 10],
-        ["inte den bästa jag sett men inte det sämsta heller", 0],
-        ["vad ska man säga det var inget man vill se igen direkt", -15],
-        ["en småtråkig film måste jag säga", -10],
-        ["den här filmen är inte särskilt rolig", -15],
-        ["den är inget vidare", -20],
-        ["den var tråkig vill inte se den igen", -20],
-        ["dålig film som inte alls är rolig", -25],
-        ["mycket tråkig film tycker jag", -30],
-        ["den var jättetråkig", -30],
-        ["den var ganska dålig faktiskt", -30],
-        ["jag tycker den är ganska kass faktiskt", -35],
-        ["det här var inget mästerverk direkt", -35],
-        ["den sunkigaste film jag sett på länge", -40],
-        ["denna så kallade komedi är inte ett dugg rolig", -40],
-        ["en riktigt dålig film", -50],
-        ["rent skräp finns inget annat att säga", -65],
-        ["så himla trist", -60],
-        ["så trist att jag nästan somnade", -65],
-        ["hur sopig som helst", -70],
-        ["asdålig film fattar inte att de gör sånt", -75],
-        ["den här filmen suger helt enkelt", -75],
-        ["fattar inte hur en film kan vara så dålig", -75],
-        ["filmen suger stenhårt", -80],
-        ["det var 90 minuter av mitt liv jag aldrig kommer att få "
-         "tillbaka", -80],
-        ["detta var rent skräp finns inget annat att säga", -80],
-        ["en riktig jävla skitfilm", -85],
-        ["den var riktigt jävla sämst", -87],
-        ["århundradets sämsta film alla kategorier", -90],
-        ["det är den sämsta film jag någonsin sett", -90],
-        ["aldrig har mänligheten utsatts för värre smörja än detta", -95],
-        ]
-
     test_data = [
         "århundradets bästa film enligt min mening",
         "det här är min nya favoritfilm",
@@ -483,7 +947,7 @@ def demo():
         "jag ger 5 betyg till filmen eftersom filmen är rolig",
         ]
 
-    for sentence, score in train_data:
+    for sentence, score in demo_train_data:
         sentence = remove_words(sentence)
         matrix.set_sentence_value(sentence, score)
         bag.add_words(sentence.split(" "))
@@ -502,5 +966,6 @@ def demo():
 
 
 if __name__ == "__main__":
+    import doctest
     demo()
     doctest.testmod()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+"""Train NGramMatrix models on large labelled corpora.
+
+A corpus is either a path to a CSV file with one "sentence,value" row
+per line, or any iterable of (sentence, value) rows. Files are read in
+chunks, so the whole corpus never has to fit in memory.
+"""
+
+import collections
+import csv
+import itertools
+import multiprocessing
+
+from twitgrep import text
+from twitgrep import vocabulary
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def read_corpus(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield lists of at most chunk_size (sentence, value) rows from the
+    CSV file at path.
+    """
+
+    with open(path, "r", newline="", encoding="utf-8") as file_handle:
+        rows = ((sentence, float(value))
+                for sentence, value in csv.reader(file_handle))
+
+        for chunk in chunked(rows, chunk_size):
+            yield chunk
+
+
+def chunked(rows, chunk_size):
+    """Yield lists of at most chunk_size rows from an iterable.
+
+    >>> list(chunked(range(5), 2))
+    [[0, 1], [2, 3], [4]]
+    """
+
+    rows = iter(rows)
+
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def corpus_chunks(corpus, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Return an iterator of row chunks for a corpus path or iterable.
+    """
+
+    if isinstance(corpus, str):
+        return read_corpus(corpus, chunk_size)
+
+    return chunked(corpus, chunk_size)
+
+
+def encode_rows(rows, vocab):
+    """Return (word IDs, value) rows for (sentence, value) rows, adding
+    new words to vocab.
+    """
+
+    return [(vocab.add_all(text.sentence_tokens(sentence)), value)
+            for sentence, value in rows]
+
+
+def train_chunk(id_rows, min_n, max_n):
+    """Train a partial NGramMatrix on (word IDs, value) rows, and return
+    its ngrams as compact arrays (see NGramMatrix.packed).
+
+    The keys of the partial are made from the IDs it was given, so they
+    can be merged into a matrix using the vocabulary that encoded them
+    with merge_packed, without translating anything.
+    """
+
+    matrix = text.NGramMatrix(min_n, max_n, vocab=vocabulary.Vocabulary())
+
+    for ids, value in id_rows:
+        matrix.set_ids_value(ids, value)
+
+    return matrix.packed()
+
+
+def train(corpus, min_n=1, max_n=3, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Train an NGramMatrix on a corpus in this process.
+
+    >>> matrix = train([("bra film", 80), ("dålig film", -80)], 1, 2)
+    >>> matrix.get_sentence_value("bra film")
+    80.0
+    """
+
+    matrix = text.NGramMatrix(min_n, max_n)
+
+    for rows in corpus_chunks(corpus, chunk_size):
+        for sentence, value in rows:
+            matrix.set_sentence_value(sentence, value)
+
+    return matrix
+
+
+def train_parallel(corpus, min_n=1, max_n=3, workers=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE):
+    """Train an NGramMatrix on a corpus using a pool of worker processes.
+
+    This process turns each chunk of the corpus into word IDs from the
+    matrix's vocabulary, and a worker trains a partial matrix on them.
+    The partials already use the right IDs and come back as arrays
+    grouped by shard, so merging them is mostly a bulk dict update per
+    shard. They are merged in corpus order, so the result is the same
+    as the one from train(). At most two chunks per worker are in
+    flight at a time, which keeps memory use bounded.
+    """
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    matrix = text.NGramMatrix(min_n, max_n)
+    pending = collections.deque()
+
+    with multiprocessing.Pool(workers) as pool:
+        for rows in corpus_chunks(corpus, chunk_size):
+            id_rows = encode_rows(rows, matrix.vocab)
+            pending.append(pool.apply_async(train_chunk,
+                                            (id_rows, min_n, max_n)))
+
+            if len(pending) >= workers * 2:
+                matrix.merge_packed(pending.popleft().get())
+
+        while pending:
+            matrix.merge_packed(pending.popleft().get())
+
+    return matrix
+
+
+def train_hashed(corpus, min_n=1, max_n=3, epochs=1,
+                 chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """Train a hashing.HashedNGramModel on a corpus, one chunk at a time.
+
+    Each epoch reads the corpus again, so with more than one epoch the
+    corpus must be a path or a list. Other keyword arguments are passed
+    on to HashedNGramModel.
+    """
+
+    from twitgrep import hashing
+
+    model = hashing.HashedNGramModel(min_n, max_n, **kwargs)
+
+    for _ in range(epochs):
+        for rows in corpus_chunks(corpus, chunk_size):
+            model.update(rows)
+
+    return model
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -3,13 +3,13 @@
 """Run sentiment analysis on Twitter.
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
+from sqlalchemy import text as sql_text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import Column, DateTime, String, Integer, func
 from sqlalchemy.ext.declarative import declarative_base
 
 from twitgrep import text
-from twitgrep import grep
 
 Base = declarative_base()
 
@@ -26,6 +26,8 @@ class TweetPart(Base):
     post_text = Column(String)
     time = Column(DateTime, default=func.now())
     sentiment = Column(Integer)
+    model_id = Column(String)
+    model_version = Column(Integer)
     target = Column(Integer)
 
 
@@ -33,38 +35,88 @@ class TwitSent(object):
     """A class for running sentiment analysis on Twitter.
     """
 
-    def __init__(self):
-        self.engine = create_engine("sqlite:///tweets.sqlite")
+    def __init__(self, db_url="sqlite:///tweets.sqlite"):
+        self.engine = create_engine(db_url)
         self.session = sessionmaker()
         self.session.configure(bind=self.engine)
 
         Base.metadata.create_all(self.engine)
+        self.migrate()
+        self.model = None
+
+    def migrate(self):
+        """Add any columns of TweetPart that are missing from an existing
+        tweet_part table.
+
+        create_all only creates tables that don't exist, so a database
+        from before a column was added needs this.
+        """
+
+        table = TweetPart.__table__
+        existing = set(column["name"] for column in
+                       inspect(self.engine).get_columns(table.name))
+
+        with self.engine.begin() as conn:
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+
+                column_type = column.type.compile(dialect=self.engine.dialect)
+                conn.execute(sql_text("ALTER TABLE %s ADD COLUMN %s %s" %
+                                      (table.name, column.name, column_type)))
 
     def run(self):
         X = self.load_data("tweets.csv")
-        model = self.make_model(X)
+        self.model = self.make_model(X)
 
-        self.stream_tweets(X, model)
+        self.stream_tweets(X, self.model)
 
     def load_data(self, path):
         """Load and previously downloaded sentences from secondary storage.
         """
         pass
 
-    def make_model(self, X):
+    def make_model(self, X, engine="matrix"):
         """Build and return a sentiment analysis model based on X.
+
+        X is a list of (sentence, value) rows, or None. engine is either
+        "matrix" for a text.NGramMatrix, or "hashed" for a fixed-memory
+        hashing.HashedNGramModel (which needs NumPy).
         """
-        pass
 
-    def stream_tweets(self, X, model):
+        if engine == "matrix":
+            model = text.NGramMatrix(1, 3)
+        elif engine == "hashed":
+            from twitgrep import hashing
+            model = hashing.HashedNGramModel(1, 3)
+        else:
+            raise ValueError("Unknown model engine: %s" % engine)
+
+        if X:
+            model.update(X)
+
+        return model
+
+    def stream_tweets(self, X, model, search_term="#svpol", hub=None):
         """Stream tweets and analyze them in real time.
+
+        If a grep.TwitGrepHub is given, its stream is shared instead of
+        opening a new one. Only the tweets that contain search_term are
+        taken from it, since the hub may track other keywords too.
         """
 
+        # Imported here so database-only work doesn't need tweepy.
+        from twitgrep import grep
+
         s = self.session()
-        search_term = "#svpol"
+        lower_term = search_term.lower()
+
+        def predicate(status):
+            return lower_term in status.text.lower()
 
         try:
-            for status in grep.TwitGrep([search_term]):
+            for status in grep.TwitGrep([search_term], hub=hub,
+                                        predicate=predicate):
                 if status.text.startswith("RT @"):
                     continue
                 if "…" in status.text:
@@ -73,13 +125,14 @@ class TwitSent(object):
                 sentences = text.normalize_and_split_sentences(status.text)
                 print("\nTweet from %s:" % status.user.screen_name)
                 for sentence in sentences:
-                    self.handle_sentence(sentence, search_term, status, s)
+                    self.handle_sentence(sentence, search_term, status, s,
+                                         model)
 
         except KeyboardInterrupt:
             print()
             raise SystemExit
 
-    def handle_sentence(self, sentence, search_term, status, s):
+    def handle_sentence(self, sentence, search_term, status, s, model=None):
         """Handle sentence (part of a tweet).
         """
 
@@ -96,20 +149,51 @@ class TwitSent(object):
         if len(post_sentence) < 1:
             return False
 
+        sentiment = None
+        model_id = None
+        model_version = None
+        if model is not None:
+            value, model_version = model.score(post_sentence)
+            sentiment = text.round_sentiment(value)
+            model_id = model.model_id
+
         print("  -", post_sentence)
         part = TweetPart(search_term=search_term,
                          user=status.user.screen_name,
                          pre_text=sentence,
                          post_text=post_sentence,
-                         sentiment=None,
+                         sentiment=sentiment,
+                         model_id=model_id,
+                         model_version=model_version,
                          target=None)
         s.add(part)
         s.commit()
 
     def set_target(self, tweet, target):
         """Set a user-defined target sentiment on a tweet part.
+
+        The labelled part is also folded into the running model, so
+        sentences streamed after this are scored with it. If the part
+        already had a target, that value is taken out of the model
+        first, and clearing the target with None only does that.
         """
 
+        old_target = tweet.target
+        tweet.target = target
+
+        if self.model is None or not tweet.post_text or old_target == target:
+            return
+
+        rows = []
+        if target is not None:
+            rows.append((tweet.post_text, target))
+
+        removed = []
+        if old_target is not None:
+            removed.append((tweet.post_text, old_target))
+
+        self.model.update(rows, removed)
+
     def format_tweet_for_csv(self, status, search_term):
         """Return a string formatted for writing to a CSV file.
         """
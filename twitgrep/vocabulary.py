@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+"""Map words to dense integer IDs, and n-grams to packed integer keys.
+
+Keeping integers instead of strings in long-lived dicts saves memory,
+and hashing a small int is much cheaper than hashing a string.
+"""
+
+import threading
+
+# An n-gram of word IDs is packed into one integer of at most this many
+# bits, with KEY_BITS // n bits per word ID.
+KEY_BITS = 64
+
+
+class Vocabulary(object):
+    """A two-way mapping between tokens and dense integer IDs.
+
+    >>> vocabulary = Vocabulary()
+    >>> vocabulary.add_all(["en", "bra", "film", "en"])
+    [0, 1, 2, 0]
+    >>> vocabulary.lookup_all(["bra", "okänd"])
+    [1, None]
+    >>> vocabulary.token(2)
+    'film'
+    >>> len(vocabulary)
+    3
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.tokens = []
+        self.lock = threading.Lock()
+
+    def add(self, token):
+        """Return the ID of token, giving it a new one if needed.
+        """
+
+        try:
+            return self.ids[token]
+        except KeyError:
+            pass
+
+        with self.lock:
+            # Another thread may have added it while we waited.
+            token_id = self.ids.get(token)
+            if token_id is None:
+                token_id = len(self.tokens)
+                self.tokens.append(token)
+                self.ids[token] = token_id
+
+            return token_id
+
+    def add_all(self, tokens):
+        """Return the IDs of tokens, giving new ones where needed.
+        """
+
+        ids = self.ids
+        return [ids[token] if token in ids else self.add(token)
+                for token in tokens]
+
+    def lookup_all(self, tokens):
+        """Return the IDs of tokens, with None for unknown tokens.
+        """
+
+        get = self.ids.get
+        return [get(token) for token in tokens]
+
+    def token(self, token_id):
+        """Return the token with the given ID.
+        """
+        return self.tokens[token_id]
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __getstate__(self):
+        """Pickle the tokens only; the IDs are their positions.
+        """
+        return {"tokens": self.tokens}
+
+    def __setstate__(self, state):
+        self.__init__()
+        for token in state["tokens"]:
+            self.add(token)
+
+
+def pack(ids):
+    """Return a single hashable key for an n-gram of word IDs.
+
+    Keys are only unique among n-grams of the same length. If an ID is
+    too large to fit, a tuple is returned instead.
+
+    >>> pack([7])
+    7
+    >>> pack([1, 2]) == (1 << 32) | 2
+    True
+    >>> unpack(pack([3, 0, 5]), 3)
+    [3, 0, 5]
+    >>> pack([1 << 40, 1])
+    (1099511627776, 1)
+    """
+
+    if len(ids) == 1:
+        return ids[0]
+
+    bits = KEY_BITS // len(ids)
+    limit = 1 << bits
+    key = 0
+
+    for token_id in ids:
+        if token_id >= limit:
+            return tuple(ids)
+        key = (key << bits) | token_id
+
+    return key
+
+
+def unpack(key, n):
+    """Return the word IDs of a key made by pack from n IDs.
+    """
+
+    if isinstance(key, tuple):
+        return list(key)
+
+    if n == 1:
+        return [key]
+
+    bits = KEY_BITS // n
+    mask = (1 << bits) - 1
+    ids = []
+
+    for _ in range(0, n):
+        ids.append(key & mask)
+        key = key >> bits
+
+    ids.reverse()
+    return ids
+
+
+def translate(items, n, id_map):
+    """Yield (key, value) for (key, value) items of n-gram keys, with the
+    word IDs in each key replaced by id_map[ID].
+
+    id_map is a list with the new ID of every old ID, as returned by
+    add_all(old_vocabulary.tokens), so no token strings are involved.
+
+    >>> items = [(pack([0, 2]), "x")]
+    >>> [(unpack(key, 2), value) for key, value
+    ...  in translate(items, 2, [5, 3, 4])]
+    [([5, 4], 'x')]
+    """
+
+    if n == 1:
+        for key, value in items:
+            yield id_map[key], value
+        return
+
+    bits = KEY_BITS // n
+    mask = (1 << bits) - 1
+    limit = 1 << bits
+    shifts = [bits * index for index in range(n - 1, -1, -1)]
+
+    for key, value in items:
+        if isinstance(key, tuple):
+            ids = [id_map[token_id] for token_id in key]
+        else:
+            ids = [id_map[(key >> shift) & mask] for shift in shifts]
+
+        new_key = 0
+        for token_id in ids:
+            if token_id >= limit:
+                new_key = tuple(ids)
+                break
+            new_key = (new_key << bits) | token_id
+
+        yield new_key, value
+
+
+# Shared by default, so that matrices and bags of words in the same
+# process agree on the IDs.
+shared = Vocabulary()
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()